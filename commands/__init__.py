@@ -6,6 +6,10 @@ from .config import load_config, setup_config, reset_config,test_db_connection
 from .nlp_query import run_nlp_query
 from .completion import SQLSmartCompleter
 from .schema_info import get_schema_from_db
+from .schema_select import select_relevant_schema
+from .partition import run_partition, run_partition_maintenance
+from .rollup import run_rollup
+from .session import DBSession
 
 __all__ = [
     'run_init_check',
@@ -18,5 +22,10 @@ __all__ = [
     'test_db_connection',
     'run_nlp_query',
     'SQLSmartCompleter',
-    'get_schema_from_db'
+    'get_schema_from_db',
+    'select_relevant_schema',
+    'run_partition',
+    'run_partition_maintenance',
+    'run_rollup',
+    'DBSession'
 ]
\ No newline at end of file
@@ -8,13 +8,15 @@ class SQLSmartCompleter(Completer):
             'SELECT', 'FROM', 'WHERE', 'INSERT', 'INTO', 'UPDATE', 'DELETE',
             'CREATE', 'DROP', 'ALTER', 'JOIN', 'NATURAL JOIN',
             'GROUP BY', 'ORDER BY', 'LIMIT', 'HAVING',
-            'AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN', 'IS', 'NULL'
+            'AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN', 'IS', 'NULL',
+            'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE'
         ]
 
         self.meta_commands = [
             '/reset;', '/reset_demo;', '/l;', '/_init;',
             '/reset_config;', '/config_reset;', '/help;','/h;',
-            '/test;', '/status;', 'exit;', 'quit;','/schema;'
+            '/test;', '/status;', 'exit;', 'quit;','/schema;',
+            '/partition;', '/rollup;', '/autocommit;', '/batch;', '/batch end;', '/batch cancel;'
         ]
 
         self.table_names = []
@@ -36,6 +36,15 @@ def show_help():
 - [bold]/config_reset;[/bold]  重新设置数据库连接配置
 - [bold]/status;[/bold]        查看当前数据库连接状态
 - [bold]/schema;[/bold]        查看当前数据库结构
+- [bold]/partition <表> <day|week|month> [保留分区数];[/bold]  将时序表在线转换为分区表
+- [bold]/partition;[/bold]     维护分区（补建未来分区、删除过期分区）
+- [bold]/rollup [汇总表] \\[full];[/bold]  增量刷新按小时/天汇总的统计表
+- [bold]/autocommit \\[on|off];[/bold]  查看/切换自动提交（关闭后需手动 COMMIT;）
+- [bold]/batch;[/bold]          进入批处理模式收集 INSERT/UPDATE/DELETE，[bold]/batch end;[/bold] 一次提交，[bold]/batch cancel;[/bold] 放弃
+
+[bold bright_yellow]事务：[/bold bright_yellow]
+- 支持 [bold]BEGIN; COMMIT; ROLLBACK; SAVEPOINT ...;[/bold]，事务状态跨输入保留
+- 提示符 [bold]SQL*>>>[/bold] 表示事务进行中，[bold]SQL!>>>[/bold] 表示事务已失败需 ROLLBACK
 - [bold]/help;[/bold]          显示本帮助信息
 
 [bold bright_blue]退出方式：[/bold bright_blue]
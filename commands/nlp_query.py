@@ -1,10 +1,13 @@
 # nlp_query.py
 import json
+import time
 from commands.schema_info import get_schema_from_db
+from commands.schema_select import select_relevant_schema, estimate_tokens
+from commands.sql_guard import guard_query, STATEMENT_TIMEOUT_MS
 import psycopg2
 import sqlparse
 from openai import OpenAI
-from psycopg2 import Error
+from psycopg2 import Error, errors
 from rich import print
 from rich.box import SIMPLE
 from rich.console import Console
@@ -21,8 +24,14 @@ def get_sql_from_text(question: str, config: dict) -> str:
             base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
         )
 
-        # 读取数据库结构
-        schema = get_schema_from_db(config, styled=False)
+        # 只读取与问题相关的数据库结构，失败时退回完整结构
+        t0 = time.perf_counter()
+        try:
+            schema, stats = select_relevant_schema(question, config)
+        except Exception as e:
+            print(f"[yellow]Schema 筛选失败，使用完整结构: {e}[/yellow]")
+            schema, stats = get_schema_from_db(config, styled=False), None
+        select_ms = (time.perf_counter() - t0) * 1000
 
         prompt = f"""作为SQL专家，请根据以下数据库结构和自然语言描述生成PostgreSQL查询语句：
 
@@ -36,9 +45,10 @@ def get_sql_from_text(question: str, config: dict) -> str:
         2. 不要包含任何解释或说明
         3. 确保SQL语法正确
         4. 使用标准的PostgreSQL语法
-        5. 只使用schema.sql中定义的表和列名"""
+        5. 只使用上面给出的表和列名"""
 
         # 显示等待提示动画
+        t0 = time.perf_counter()
         with console.status("[bright_cyan]正在等待大模型生成 SQL，请稍候...[/bright_cyan]", spinner="dots"):
             completion = client.chat.completions.create(
                 model="qwen-plus",
@@ -48,7 +58,17 @@ def get_sql_from_text(question: str, config: dict) -> str:
                 ]
             )
 
+        llm_ms = (time.perf_counter() - t0) * 1000
+
         response = json.loads(completion.model_dump_json())
+        usage = response.get('usage') or {}
+        prompt_tokens = usage.get('prompt_tokens') or estimate_tokens(prompt)
+        if stats:
+            print(f"[dim]Schema: {len(stats['tables'])}/{stats['total_tables']} 张表 "
+                  f"({', '.join(stats['tables'])})，约 {stats['tokens']}/{stats['full_tokens']} tokens；"
+                  f"Prompt {prompt_tokens} tokens；筛选 {select_ms:.0f} ms，模型 {llm_ms:.0f} ms[/dim]")
+        else:
+            print(f"[dim]Prompt {prompt_tokens} tokens；模型 {llm_ms:.0f} ms[/dim]")
         return response['choices'][0]['message']['content'].strip()
 
     except Exception as e:
@@ -64,16 +84,30 @@ def run_nlp_query(question: str, db_config: dict):
         return
 
     try:
+        # 格式化SQL
+        formatted_sql = sqlparse.format(sql_query, reindent=True, keyword_case='upper')
+        print(Panel(formatted_sql, title="生成的SQL查询"))
+
+        # 生成的 SQL 只读执行，并限制语句执行时间
         conn = psycopg2.connect(**db_config)
+        conn.set_session(readonly=True)
         cursor = conn.cursor()
+        # 在事务外设置，guard_query 回滚事务后仍然有效
+        conn.autocommit = True
+        cursor.execute("SET statement_timeout = %s", (STATEMENT_TIMEOUT_MS,))
+        conn.autocommit = False
+
+        sql_query = guard_query(cursor, sql_query)
+        if sql_query is None:
+            return
+
         cursor.execute(sql_query)
+        if cursor.description is None:
+            print("[yellow]查询执行成功，但没有返回结果。[/yellow]")
+            return
         results = cursor.fetchall()
         column_names = [desc[0] for desc in cursor.description]
 
-        # 格式化SQL
-        formatted_sql = sqlparse.format(sql_query, reindent=True, keyword_case='upper')
-        print(Panel(formatted_sql, title="生成的SQL查询"))
-
         # 打印表格
         console = Console()
         table = Table(show_header=True, header_style="bold", box=SIMPLE, title="查询结果")
@@ -86,6 +120,10 @@ def run_nlp_query(question: str, db_config: dict):
         console.print(table)
         console.print("\n")
 
+    except errors.QueryCanceled:
+        print(f"[red]查询超过 {STATEMENT_TIMEOUT_MS} ms 已被取消。[/red]")
+    except errors.ReadOnlySqlTransaction:
+        print("[red]生成的 SQL 试图修改数据，自然语言查询只允许只读语句。[/red]")
     except Error as e:
         print(f"[red]查询执行错误: {str(e)}[/red]")
     finally:
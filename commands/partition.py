@@ -0,0 +1,278 @@
+# partition.py
+import re
+
+import psycopg2
+from psycopg2 import Error
+from rich import print
+
+# 可分区的时序表：表名 -> (自增主键列, 时间列)
+PARTITION_TABLES = {
+    'device_status_history': ('history_id', 'timestamp'),
+    'usage_logs': ('log_id', 'start_time'),
+    'energy_consumption': ('consumption_id', 'timestamp'),
+}
+INTERVALS = {'day': '1 day', 'week': '1 week', 'month': '1 month'}
+# 提前创建的未来分区个数
+PREMAKE_PARTITIONS = 3
+# 切换表结构时等待锁的上限，避免排在长事务后面阻塞所有读写
+SWAP_LOCK_TIMEOUT = '5s'
+# 启动时例行维护（建/删分区）等待父表锁的上限，拿不到锁就跳过，下次再试
+MAINTENANCE_LOCK_TIMEOUT = '2s'
+
+_UPPER_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+_CONFIG_DDL = """
+    CREATE TABLE IF NOT EXISTS partition_config (
+        table_name TEXT PRIMARY KEY,
+        time_column TEXT NOT NULL,
+        part_interval TEXT NOT NULL,
+        retention INTEGER  -- 保留的分区个数，NULL 表示不自动删除
+    )
+"""
+
+USAGE = ("[yellow]用法: /partition <表名> <day|week|month> [保留分区数];  转换为分区表\n"
+         "      /partition;                                    维护分区并查看状态\n"
+         f"可分区的表: {', '.join(PARTITION_TABLES)}[/yellow]")
+
+
+def run_partition(db_config: dict, args: list):
+    """处理 /partition 命令"""
+    if not args:
+        run_partition_maintenance(db_config, verbose=True)
+        return
+
+    if len(args) not in (2, 3) or args[0] not in PARTITION_TABLES or args[1] not in INTERVALS \
+            or (len(args) == 3 and not args[2].isdigit()):
+        print(USAGE)
+        return
+
+    retention = int(args[2]) if len(args) == 3 else None
+    try:
+        conn = psycopg2.connect(**db_config)
+        convert_to_partitioned(conn, args[0], args[1], retention)
+    except Error as e:
+        print(f"[red]分区转换失败: {e}[/red]")
+    finally:
+        if 'conn' in locals() and not conn.closed:
+            conn.close()
+
+    run_partition_maintenance(db_config, verbose=True)
+
+
+def convert_to_partitioned(conn, table: str, unit: str, retention=None):
+    """
+    在线把普通表转换为按时间范围分区的表，不复制数据：
+
+    1. 加 NOT VALID 的 CHECK (时间列 < 当前周期末) 并在线 VALIDATE
+    2. CONCURRENTLY 建 (主键, 时间列) 唯一索引
+    3. 在一个持锁很短的事务里改名为 <表>_p_legacy，创建同名分区父表，
+       再把旧表作为 (MINVALUE, 当前周期末) 的分区挂上；已验证的 CHECK
+       让 ATTACH 无需扫描全表
+    """
+    id_col, ts_col = PARTITION_TABLES[table]
+    legacy = f"{table}_p_legacy"
+    range_chk = f"{table}_range_chk"
+    id_ts_idx = f"{table}_id_ts_key"
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    if row is None:
+        print(f"[red]表 {table} 不存在。[/red]")
+        return
+    if row[0] == 'p':
+        print(f"[yellow]表 {table} 已经是分区表。[/yellow]")
+        return
+
+    cursor.execute("SELECT 1 FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'", (table,))
+    if cursor.fetchone():
+        print(f"[red]有其他表的外键引用 {table}，无法转换为分区表。[/red]")
+        return
+
+    cursor.execute("SELECT date_trunc(%s, now()) + %s::interval", (unit, INTERVALS[unit]))
+    upper = cursor.fetchone()[0]
+
+    print(f"[blue]正在在线验证 {table}.{ts_col} < {upper} ...[/blue]")
+    cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {range_chk}')
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {range_chk} '
+                   f'CHECK ("{ts_col}" IS NOT NULL AND "{ts_col}" < %s) NOT VALID', (upper,))
+    try:
+        cursor.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {range_chk}')
+    except Error:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {range_chk}')
+        print(f"[red]{table} 中存在时间为空或晚于 {upper} 的行，请先清理后再分区。[/red]")
+        return
+
+    print(f"[blue]正在并发创建索引 {id_ts_idx} ...[/blue]")
+    cursor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {id_ts_idx} '
+                   f'ON {table} ({id_col}, "{ts_col}")')
+
+    conn.autocommit = False
+    with conn:
+        cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+        cursor.execute("""
+            SELECT conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('c', 'f', 'p') AND conname <> %s
+        """, (table, range_chk))
+        constraints = cursor.fetchall()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, id_col))
+        sequence = cursor.fetchone()[0]
+        cursor.execute("SELECT obj_description(%s::regclass, 'pg_class')", (table,))
+        table_comment = cursor.fetchone()[0]
+
+        # 旧表：时间列 NOT NULL（依赖已验证的 CHECK，不扫描），主键换成 (id, 时间列)
+        cursor.execute(f'ALTER TABLE {table} ALTER COLUMN "{ts_col}" SET NOT NULL')
+        for name, contype, _ in constraints:
+            if contype == 'p':
+                cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        cursor.execute(f'ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY USING INDEX {id_ts_idx}')
+
+        # 新的分区父表，沿用原有默认值、注释、CHECK 和外键（注释用于自然语言查询选表）
+        cursor.execute(f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING COMMENTS) '
+                       f'PARTITION BY RANGE ("{ts_col}")')
+        if table_comment:
+            cursor.execute(f'COMMENT ON TABLE {table} IS %s', (table_comment,))
+        cursor.execute(f'ALTER TABLE {table} ADD PRIMARY KEY ({id_col}, "{ts_col}")')
+        for name, contype, definition in constraints:
+            if contype != 'p':
+                cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {legacy} '
+                       f'FOR VALUES FROM (MINVALUE) TO (%s)', (upper,))
+        cursor.execute(f'CREATE TABLE {table}_p_default PARTITION OF {table} DEFAULT')
+        if sequence:
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.{id_col}')
+
+        cursor.execute(_CONFIG_DDL)
+        cursor.execute("""
+            INSERT INTO partition_config (table_name, time_column, part_interval, retention)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (table_name) DO UPDATE
+            SET time_column = EXCLUDED.time_column,
+                part_interval = EXCLUDED.part_interval,
+                retention = EXCLUDED.retention
+        """, (table, ts_col, unit, retention))
+
+    print(f"[green]{table} 已转换为按 {unit} 分区的表，历史数据保留在分区 {legacy}。[/green]")
+
+
+def _partition_bounds(cursor, table: str) -> list:
+    """返回 [(分区名, 上界字符串)]，默认分区的上界为 None"""
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname
+    """, (table,))
+    bounds = []
+    for name, expr in cursor.fetchall():
+        match = _UPPER_BOUND_RE.search(expr or '')
+        bounds.append((name, match.group(1) if match else None))
+    return bounds
+
+
+def _run_ddl(cursor, *statements):
+    """
+    在一个带 lock_timeout 的短事务中执行 DDL（cursor 所在连接须为自动提交），
+    失败时回滚并抛出异常。
+    """
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute(f"SET LOCAL lock_timeout = '{MAINTENANCE_LOCK_TIMEOUT}'")
+        for sql, params in statements:
+            cursor.execute(sql, params)
+        cursor.execute("COMMIT")
+    except Error:
+        cursor.execute("ROLLBACK")
+        raise
+
+
+def maintain_table(cursor, table: str, unit: str, retention=None) -> tuple:
+    """
+    为一张分区表补齐到未来 PREMAKE_PARTITIONS 个周期的分区，
+    并删除上界早于保留期的分区。每个分区的创建/删除单独成一个短事务。
+
+    返回:
+        (新建分区列表, 删除分区列表)
+    """
+    step = INTERVALS[unit]
+    created, dropped = [], []
+
+    bounds = _partition_bounds(cursor, table)
+    uppers = [upper for _, upper in bounds if upper]
+    cursor.execute("""
+        SELECT g, g + %s::interval
+        FROM generate_series(
+            GREATEST(date_trunc(%s, now()), (SELECT max(u::timestamptz) FROM unnest(%s::text[]) AS u)),
+            date_trunc(%s, now()) + %s * %s::interval,
+            %s::interval) AS g
+    """, (step, unit, uppers, unit, PREMAKE_PARTITIONS, step, step))
+    for start, end in cursor.fetchall():
+        name = f"{table}_p{start:%Y%m%d}"
+        try:
+            _run_ddl(cursor, (f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} '
+                              f'FOR VALUES FROM (%s) TO (%s)', (start, end)))
+            created.append(name)
+        except Error as e:
+            print(f"[red]创建分区 {name} 失败: {e}[/red]")
+
+    if retention is not None:
+        for name, upper in bounds:
+            if upper is None:
+                continue
+            cursor.execute("SELECT %s::timestamptz <= date_trunc(%s, now()) - %s * %s::interval",
+                           (upper, unit, retention, step))
+            if not cursor.fetchone()[0]:
+                continue
+            try:
+                _run_ddl(cursor, (f'ALTER TABLE {table} DETACH PARTITION {name}', None),
+                         (f'DROP TABLE {name}', None))
+                dropped.append(name)
+            except Error as e:
+                print(f"[red]删除分区 {name} 失败: {e}[/red]")
+
+    return created, dropped
+
+
+def run_partition_maintenance(db_config: dict, verbose: bool = False):
+    """对 partition_config 中登记的所有表执行分区维护（启动时也会自动调用）"""
+    try:
+        conn = psycopg2.connect(**db_config)
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT to_regclass('partition_config')")
+        if cursor.fetchone()[0] is None:
+            if verbose:
+                print("[yellow]还没有分区表。[/yellow]")
+                print(USAGE)
+            return
+
+        cursor.execute("SELECT table_name, part_interval, retention FROM partition_config ORDER BY table_name")
+        for table, unit, retention in cursor.fetchall():
+            # 每张表单独处理，一张表被锁住或出错不影响其他表
+            try:
+                created, dropped = maintain_table(cursor, table, unit, retention)
+            except Error as e:
+                print(f"[red]{table}: 分区维护失败: {e}[/red]")
+                continue
+            if created:
+                print(f"[green]{table}: 已创建分区 {', '.join(created)}[/green]")
+            if dropped:
+                print(f"[yellow]{table}: 已按保留期删除分区 {', '.join(dropped)}[/yellow]")
+            if verbose:
+                keep = f"保留 {retention} 个分区" if retention is not None else "不自动删除"
+                names = [name for name, _ in _partition_bounds(cursor, table)]
+                print(f"[bright_cyan]- {table}: 按 {unit} 分区，{keep}，共 {len(names)} 个分区[/bright_cyan]")
+
+    except Error as e:
+        print(f"[red]分区维护失败: {e}[/red]")
+    finally:
+        if 'conn' in locals() and not conn.closed:
+            cursor.close()
+            conn.close()
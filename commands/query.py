@@ -1,21 +1,25 @@
 # query.py
-import psycopg2
+import sqlparse
 from psycopg2 import Error
 from rich import print
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
+from commands.session import DBSession
 from commands.validate import get_ai_analysis
 
 console = Console()
 
 
-def run_query(sql: str, db_config: dict):
+def run_query(sql: str, db_config: dict, session: DBSession = None):
+    """在会话连接上执行 SQL；未传入 session 时使用一次性的自动提交连接"""
+    own_session = session is None
+    if own_session:
+        session = DBSession(db_config)
+
     try:
-        print("[blue]正在连接数据库...[/blue]")
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
+        cursor = session.cursor(sql)
 
         print(f"[blue]正在执行查询: {sql}[/blue]")
         cursor.execute(sql)
@@ -39,22 +43,35 @@ def run_query(sql: str, db_config: dict):
         else:
             print("[yellow]查询执行成功，但没有返回结果。[/yellow]")
 
-        # 添加 EXPLAIN ANALYZE 分析
-        try:           
-            if not sql.strip().lower().startswith("explain"):
+        # 添加 EXPLAIN ANALYZE 分析（会再次执行语句，只对 SELECT 做）
+        if sqlparse.parse(sql)[0].get_type() == 'SELECT':
+            # SELECT 也可能有副作用（WITH ... INSERT、nextval），
+            # 第二次执行总是放在随后回滚的事务/保存点中，不会生效也不会影响用户事务
+            in_transaction = session.in_transaction
+            cursor.execute("SAVEPOINT _explain" if in_transaction else "BEGIN")
+            try:
                 explain_sql = f"EXPLAIN ANALYZE {sql}"
                 cursor.execute(explain_sql)
                 plan = cursor.fetchall()
                 explain_text = "\n".join([row[0] for row in plan])
-                
+
                 console.print(Panel(explain_text, title="EXPLAIN ANALYZE"))
 
-        except Exception as explain_err:
-            print(f"[yellow]EXPLAIN ANALYZE 执行失败: {explain_err}[/yellow]")
+            except Exception as explain_err:
+                print(f"[yellow]EXPLAIN ANALYZE 执行失败: {explain_err}[/yellow]")
+            finally:
+                if in_transaction:
+                    # ROLLBACK TO 不会结束保存点，需释放，否则每次查询都多嵌套一层子事务
+                    cursor.execute("ROLLBACK TO SAVEPOINT _explain")
+                    cursor.execute("RELEASE SAVEPOINT _explain")
+                else:
+                    cursor.execute("ROLLBACK")
 
     except Error as e:
         error_msg = str(e)
         print(f"[red]查询执行失败: {error_msg}[/red]")
+        if session.in_transaction:
+            print("[yellow]当前事务已失败，请执行 ROLLBACK; 或 ROLLBACK TO SAVEPOINT[/yellow]")
 
         # ⛔ 判断是否为语法类错误
         syntax_keywords = [
@@ -71,7 +88,7 @@ def run_query(sql: str, db_config: dict):
                 print(f"[yellow]AI 分析失败：{ai_err}[/yellow]")
 
     finally:
-        if 'conn' in locals() and not conn.closed:
+        if 'cursor' in locals():
             cursor.close()
-            conn.close()
-            print("[blue]数据库连接已关闭[/blue]")
+        if own_session:
+            session.close()
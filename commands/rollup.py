@@ -0,0 +1,159 @@
+# rollup.py
+import psycopg2
+from psycopg2 import Error
+from rich import print
+
+# 汇总表定义：按 (keys, 时间桶) 聚合源表，用源表自增 id 作为增量水位
+ROLLUPS = {
+    'energy_hourly': {
+        'source': 'energy_consumption', 'id_col': 'consumption_id', 'time_col': 'timestamp',
+        'unit': 'hour', 'keys': ['device_id'],
+        'aggs': [('kwh_total', 'SUM(consumption_kwh)::double precision'), ('readings', 'COUNT(*)')],
+    },
+    'energy_daily': {
+        'source': 'energy_consumption', 'id_col': 'consumption_id', 'time_col': 'timestamp',
+        'unit': 'day', 'keys': ['device_id'],
+        'aggs': [('kwh_total', 'SUM(consumption_kwh)::double precision'), ('readings', 'COUNT(*)')],
+    },
+    'usage_daily': {
+        'source': 'usage_logs', 'id_col': 'log_id', 'time_col': 'start_time',
+        'unit': 'day', 'keys': ['device_id'],
+        'aggs': [('uses', 'COUNT(*)'), ('duration_seconds', 'SUM(duration_seconds)')],
+    },
+    'status_changes_daily': {
+        'source': 'device_status_history', 'id_col': 'history_id', 'time_col': 'timestamp',
+        'unit': 'day', 'keys': ['device_id'],
+        'aggs': [('changes', 'COUNT(*)')],
+    },
+}
+
+# 确定水位时等待进行中写事务的上限
+WATERMARK_LOCK_TIMEOUT = '5s'
+
+_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        rollup_name TEXT PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        refreshed_at TIMESTAMP WITH TIME ZONE
+    )
+"""
+
+USAGE = ("[yellow]用法: /rollup;                 增量刷新所有汇总表\n"
+         "      /rollup <汇总表>;        增量刷新指定汇总表\n"
+         "      /rollup <汇总表> full;   清空后全量重建\n"
+         f"汇总表: {', '.join(ROLLUPS)}[/yellow]")
+
+
+def _select_sql(spec: dict) -> str:
+    """生成按 (keys, bucket) 聚合源表的 SELECT"""
+    keys = ", ".join(spec['keys'])
+    aggs = ", ".join(f"{expr} AS {name}" for name, expr in spec['aggs'])
+    return (f"SELECT {keys}, date_trunc('{spec['unit']}', \"{spec['time_col']}\") AS bucket, {aggs} "
+            f"FROM {spec['source']} WHERE \"{spec['time_col']}\" IS NOT NULL "
+            f"GROUP BY {keys}, bucket")
+
+
+def committed_max_id(cursor, source: str, id_col: str) -> int:
+    """
+    返回源表中不会再有更小 id 晚提交的最大 id。
+
+    自增 id 在插入时分配、提交时才可见，顺序可能乱。插入事务从取 id 到提交
+    一直持有 ROW EXCLUSIVE 锁，因此短暂拿到 SHARE 锁就说明所有已分配的 id
+    都已提交或回滚。必须在单独的事务中调用，提交后立即释放锁。
+    """
+    cursor.execute(f"SET LOCAL lock_timeout = '{WATERMARK_LOCK_TIMEOUT}'")
+    cursor.execute(f"LOCK TABLE {source} IN SHARE MODE")
+    cursor.execute(f"SELECT COALESCE(MAX({id_col}), 0) FROM {source}")
+    return cursor.fetchone()[0]
+
+
+def refresh_rollup(cursor, name: str, max_id: int, full: bool = False) -> int:
+    """
+    增量刷新一张汇总表：找出 id 在 (水位, max_id] 内的新行所落入的 (keys, 时间桶)，
+    只对这些桶重新聚合并 upsert，然后把水位推进到 max_id。
+    max_id 应来自 committed_max_id，保证乱序提交的行不会被漏掉。
+    源表上的 UPDATE/DELETE 不会被捕获，需要时用 full=True 全量重建。
+
+    返回:
+        本次重新计算的桶数
+    """
+    spec = ROLLUPS[name]
+    keys = ", ".join(spec['keys'])
+
+    cursor.execute("SELECT to_regclass(%s)", (name,))
+    if cursor.fetchone()[0] is None:
+        cursor.execute(f"CREATE TABLE {name} AS {_select_sql(spec)} WITH NO DATA")
+        cursor.execute(f"ALTER TABLE {name} ADD PRIMARY KEY ({keys}, bucket)")
+
+    cursor.execute("INSERT INTO rollup_state (rollup_name) VALUES (%s) ON CONFLICT DO NOTHING", (name,))
+    # 行锁保证同一汇总表不会被并发刷新
+    cursor.execute("SELECT last_id FROM rollup_state WHERE rollup_name = %s FOR UPDATE", (name,))
+    last_id = cursor.fetchone()[0]
+    if full:
+        cursor.execute(f"TRUNCATE {name}")
+        last_id = 0
+
+    if max_id <= last_id:
+        return 0
+
+    key_match = " AND ".join(f"s.{k} = c.{k}" for k in spec['keys'])
+    time_col = f"\"{spec['time_col']}\""
+    cursor.execute(f"""
+        CREATE TEMP TABLE _rollup_changed ON COMMIT DROP AS
+        SELECT DISTINCT {keys}, date_trunc('{spec['unit']}', {time_col}) AS bucket
+        FROM {spec['source']}
+        WHERE {spec['id_col']} > %s AND {spec['id_col']} <= %s AND {time_col} IS NOT NULL
+    """, (last_id, max_id))
+    changed = cursor.rowcount
+
+    aggs = ", ".join(f"{expr} AS {agg}" for agg, expr in spec['aggs'])
+    updates = ", ".join(f"{agg} = EXCLUDED.{agg}" for agg, _ in spec['aggs'])
+    cursor.execute(f"""
+        INSERT INTO {name}
+        SELECT {", ".join(f"s.{k}" for k in spec['keys'])}, c.bucket, {aggs}
+        FROM {spec['source']} s
+        JOIN _rollup_changed c
+          ON {key_match}
+         AND s.{time_col} >= c.bucket
+         AND s.{time_col} < c.bucket + interval '1 {spec['unit']}'
+        GROUP BY {", ".join(f"s.{k}" for k in spec['keys'])}, c.bucket
+        ON CONFLICT ({keys}, bucket) DO UPDATE SET {updates}
+    """)
+
+    cursor.execute("UPDATE rollup_state SET last_id = %s, refreshed_at = now() WHERE rollup_name = %s",
+                   (max_id, name))
+    return changed
+
+
+def run_rollup(db_config: dict, args: list):
+    """处理 /rollup 命令"""
+    full = len(args) == 2 and args[1] == 'full'
+    if len(args) > 2 or (len(args) == 2 and not full) or (args and args[0] not in ROLLUPS):
+        print(USAGE)
+        return
+
+    names = [args[0]] if args else list(ROLLUPS)
+    try:
+        conn = psycopg2.connect(**db_config)
+        cursor = conn.cursor()
+        with conn:
+            cursor.execute(_STATE_DDL)
+
+        for name in names:
+            # 每张汇总表一个事务，失败不影响其他汇总表
+            spec = ROLLUPS[name]
+            try:
+                with conn:
+                    max_id = committed_max_id(cursor, spec['source'], spec['id_col'])
+                with conn:
+                    changed = refresh_rollup(cursor, name, max_id, full=full)
+                print(f"[green]{name}: 重新计算了 {changed} 个时间桶[/green]")
+            except Error as e:
+                print(f"[red]{name} 刷新失败: {e}[/red]")
+
+    except Error as e:
+        print(f"[red]汇总表刷新失败: {e}[/red]")
+    finally:
+        if 'conn' in locals() and not conn.closed:
+            cursor.close()
+            conn.close()
@@ -18,6 +18,7 @@ def get_schema_from_db(config: dict, styled: bool = False) -> str:
         cursor.execute("""
             SELECT table_name FROM information_schema.tables
             WHERE table_schema = 'public'
+              AND table_name NOT IN (SELECT relname FROM pg_class WHERE relispartition)
         """)
         tables = [row[0] for row in cursor.fetchall()]
         schema_lines = []
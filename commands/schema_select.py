@@ -0,0 +1,182 @@
+# schema_select.py
+import re
+
+import psycopg2
+
+# 发送给大模型的 schema 上下文的默认 token 预算（估算值）
+SCHEMA_TOKEN_BUDGET = 1200
+# 沿外键扩展的最大层数，例如 devices -> rooms -> homes 为 2 层
+FK_EXPAND_DEPTH = 2
+# 得分达到最高分的该比例才作为种子表，避免弱命中把无关表带进来
+SEED_SCORE_RATIO = 0.6
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RE = re.compile(r"[一-鿿]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其余约 4 字符 1 token"""
+    cjk = sum(len(run) for run in _CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _terms(text: str) -> set:
+    """把文本拆成用于词法匹配的词项（英文单词及其单数形式 + 中文二元组）"""
+    text = (text or "").lower()
+    terms = set()
+    for word in _WORD_RE.findall(text):
+        terms.add(word)
+        if len(word) > 3 and word.endswith("s"):
+            terms.add(word[:-1])
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            terms.add(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def load_schema_meta(config: dict) -> dict:
+    """
+    一次性读取 public 下所有表的字段、类型、注释和外键。
+
+    返回:
+        {表名: {"comment": str, "columns": [(字段, 类型, 注释)], "fks": [(字段, 引用表, 引用字段)]}}
+    """
+    conn = psycopg2.connect(**config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT c.relname, obj_description(c.oid, 'pg_class')
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+            ORDER BY c.relname
+        """)
+        meta = {name: {"comment": comment or "", "columns": [], "fks": []}
+                for name, comment in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod),
+                   col_description(c.oid, a.attnum)
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY c.relname, a.attnum
+        """)
+        for table, column, dtype, comment in cursor.fetchall():
+            if table in meta:
+                meta[table]["columns"].append((column, dtype, comment or ""))
+
+        cursor.execute("""
+            SELECT cl.relname, a.attname, rcl.relname, ra.attname
+            FROM pg_constraint con
+            JOIN pg_class cl ON cl.oid = con.conrelid
+            JOIN pg_class rcl ON rcl.oid = con.confrelid
+            JOIN pg_namespace n ON n.oid = cl.relnamespace
+            CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, refnum)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.refnum
+            WHERE con.contype = 'f' AND n.nspname = 'public'
+        """)
+        for table, column, ref_table, ref_column in cursor.fetchall():
+            if table in meta:
+                meta[table]["fks"].append((column, ref_table, ref_column))
+
+        return meta
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def score_tables(question: str, meta: dict) -> dict:
+    """
+    按问题与表名、字段名、注释的词法重合度为每张表打分。
+    *_id 和外键列不计分：它们只是指向其他表，几乎每张表都有 user_id 之类的列。
+    """
+    q_terms = _terms(question)
+    scores = {}
+    for table, info in meta.items():
+        fk_columns = {column for column, _, _ in info["fks"]}
+        score = 3 * len(q_terms & _terms(table.replace("_", " ")))
+        score += 2 * len(q_terms & _terms(info["comment"]))
+        for column, _, comment in info["columns"]:
+            if column in fk_columns or column.endswith("_id"):
+                continue
+            score += len(q_terms & _terms(column.replace("_", " ")))
+            score += len(q_terms & _terms(comment))
+        scores[table] = score
+    return scores
+
+
+def expand_by_fk(seeds: list, meta: dict, depth: int = FK_EXPAND_DEPTH) -> list:
+    """按种子顺序逐个沿外键引用方向扩展：每个种子后面紧跟它的关联表"""
+    ordered, seen = [], set()
+    for seed in seeds:
+        if seed in seen:
+            continue
+        seen.add(seed)
+        ordered.append(seed)
+        frontier = [seed]
+        for _ in range(depth):
+            next_frontier = []
+            for table in frontier:
+                for _, ref_table, _ in meta[table]["fks"]:
+                    if ref_table in meta and ref_table not in seen:
+                        seen.add(ref_table)
+                        ordered.append(ref_table)
+                        next_frontier.append(ref_table)
+            frontier = next_frontier
+    return ordered
+
+
+def render_table(table: str, info: dict) -> str:
+    """以 get_schema_from_db 的纯文本格式输出单张表，附带注释与外键"""
+    column_defs = ", ".join(f"{col} {dtype}" for col, dtype, _ in info["columns"])
+    line = f"表 {table} ({column_defs})"
+    if info["comment"]:
+        line += f" -- {info['comment']}"
+    for column, ref_table, ref_column in info["fks"]:
+        line += f"\n  外键 {table}.{column} -> {ref_table}.{ref_column}"
+    return line
+
+
+def select_relevant_schema(question: str, config: dict,
+                           token_budget: int = SCHEMA_TOKEN_BUDGET) -> tuple:
+    """
+    只挑出与问题相关的表作为大模型的 schema 上下文。
+
+    先按词法匹配打分，得分不低于最高分 SEED_SCORE_RATIO 的表作为种子，
+    再逐个沿外键扩展（如 devices -> rooms -> homes），按此顺序加入，
+    遇到放不进 token 预算的表即停止（至少保留一张表）。
+    没有任何表命中时退回完整结构（不受预算限制）。
+
+    返回:
+        (schema 文本, 统计信息 dict)
+    """
+    meta = load_schema_meta(config)
+    blocks = {table: render_table(table, info) for table, info in meta.items()}
+    full_tokens = estimate_tokens("\n".join(blocks.values()))
+
+    scores = score_tables(question, meta)
+    top = max(scores.values(), default=0)
+    seeds = sorted((t for t, s in scores.items() if s > 0 and s >= top * SEED_SCORE_RATIO),
+                   key=lambda t: -scores[t])
+
+    selected, used = [], 0
+    if not seeds:
+        selected, used = list(meta), full_tokens
+    for table in expand_by_fk(seeds, meta):
+        cost = estimate_tokens(blocks[table]) + 1
+        # 直接停止而不是跳过，避免无关的小表挤占被跳过的关联表的位置
+        if selected and used + cost > token_budget:
+            break
+        selected.append(table)
+        used += cost
+
+    stats = {
+        "tables": selected,
+        "total_tables": len(meta),
+        "tokens": used,
+        "full_tokens": full_tokens,
+    }
+    return "\n".join(blocks[t] for t in selected), stats
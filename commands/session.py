@@ -0,0 +1,176 @@
+# session.py
+import re
+
+import psycopg2
+import sqlparse
+from psycopg2 import Error
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR
+)
+from rich import print
+
+# 批处理时每次往返发送的语句数，以及合并为一条多行 INSERT 的最大行组数
+BATCH_PAGE_SIZE = 100
+
+# 这些语句自己控制事务（或不能在事务中执行），关闭自动提交时不为它们隐式 BEGIN
+_NO_IMPLICIT_BEGIN = {'BEGIN', 'START', 'COMMIT', 'END', 'ROLLBACK', 'ABORT', 'SAVEPOINT', 'RELEASE', 'VACUUM'}
+_INSERT_VALUES_RE = re.compile(r"^\s*(INSERT\s+INTO\s+[^\s(]+\s*(?:\([^)]*\))?\s*VALUES)\s*(\(.*\))\s*$",
+                               re.IGNORECASE | re.DOTALL)
+_NO_MERGE_RE = re.compile(r"\b(ON\s+CONFLICT|RETURNING|SELECT)\b", re.IGNORECASE)
+
+
+def _first_word(sql: str) -> str:
+    words = sql.split()
+    return words[0].upper() if words else ''
+
+
+def pack_statements(statements: list) -> list:
+    """
+    把相邻、目标表和列相同的 INSERT ... VALUES 合并为一条多行 INSERT
+    （与 execute_values 发送的语句形式相同），其余语句原样保留。
+    每项应为单条语句；VALUES 部分含顶层分号（即实际是多条语句）的项不参与合并。
+    VALUES 中含子查询的项也不合并：子查询可能读取目标表，合并后看不到前几行。
+    """
+    packed, last_key, rows = [], None, 0
+    for stmt in statements:
+        match = _INSERT_VALUES_RE.match(stmt)
+        if match and not _NO_MERGE_RE.search(match.group(2)) and len(sqlparse.split(stmt)) == 1:
+            key = " ".join(match.group(1).split())
+            if '"' not in key:
+                key = key.lower()
+            if key == last_key and rows < BATCH_PAGE_SIZE:
+                packed[-1] += f",\n{match.group(2)}"
+                rows += 1
+                continue
+            last_key, rows = key, 1
+        else:
+            last_key = None
+        packed.append(stmt)
+    return packed
+
+
+class DBSession:
+    """交互式控制台共享的数据库连接，跨输入跟踪事务状态和批处理队列"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.conn = None
+        self.autocommit = True
+        self.batch = None  # 批处理模式下收集的语句，None 表示未开启
+
+    def connect(self):
+        if self.conn is None or self.conn.closed:
+            print("[blue]正在连接数据库...[/blue]")
+            self.conn = psycopg2.connect(**self.config)
+            # 事务完全由服务器端的 BEGIN/COMMIT 控制，psycopg2 不再隐式开启事务
+            self.conn.autocommit = True
+        return self.conn
+
+    @property
+    def status(self) -> int:
+        if self.conn is None or self.conn.closed:
+            return TRANSACTION_STATUS_IDLE
+        return self.conn.info.transaction_status
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.status in (TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR)
+
+    def prompt_label(self) -> str:
+        """提示符中的会话状态：* 事务中，! 事务已失败，batch:n 已收集 n 条语句"""
+        label = 'SQL' if self.autocommit else 'SQL(noauto)'
+        if self.batch is not None:
+            label += f'(batch:{len(self.batch)})'
+        if self.status == TRANSACTION_STATUS_INTRANS:
+            label += '*'
+        elif self.status == TRANSACTION_STATUS_INERROR:
+            label += '!'
+        return label
+
+    def cursor(self, sql: str = ''):
+        """返回游标；关闭自动提交且不在事务中时先隐式 BEGIN"""
+        cursor = self.connect().cursor()
+        if not self.autocommit and self.status == TRANSACTION_STATUS_IDLE \
+                and _first_word(sql) not in _NO_IMPLICIT_BEGIN:
+            cursor.execute("BEGIN")
+        return cursor
+
+    def set_autocommit(self, args: list):
+        """处理 /autocommit 命令"""
+        if not args:
+            print(f"[green]自动提交: {'on' if self.autocommit else 'off'}[/green]")
+            return
+        if args[0] not in ('on', 'off'):
+            print("[yellow]用法: /autocommit \\[on|off];[/yellow]")
+            return
+        if self.in_transaction:
+            print("[yellow]当前事务尚未结束，请先 COMMIT; 或 ROLLBACK;[/yellow]")
+            return
+        self.autocommit = args[0] == 'on'
+        print(f"[green]自动提交已{'开启' if self.autocommit else '关闭'}[/green]")
+
+    def run_batch(self, args: list):
+        """处理 /batch 命令"""
+        action = args[0] if args else ''
+        if action == '':
+            if self.batch is None:
+                self.batch = []
+                print("[green]已进入批处理模式：INSERT/UPDATE/DELETE 将被收集，"
+                      "/batch end; 一次性提交，/batch cancel; 放弃[/green]")
+            else:
+                print(f"[green]批处理模式中，已收集 {len(self.batch)} 条语句[/green]")
+        elif action == 'cancel' and self.batch is not None:
+            print(f"[yellow]已放弃 {len(self.batch)} 条语句[/yellow]")
+            self.batch = None
+        elif action == 'end' and self.batch is not None:
+            statements, self.batch = self.batch, None
+            self.flush_batch(statements)
+        else:
+            print("[yellow]用法: /batch;  /batch end;  /batch cancel;[/yellow]")
+
+    def add_to_batch(self, sql: str):
+        """批处理模式下收集 DML 语句，一次输入多条时拆开，队列中每项只有一条语句"""
+        statements = [stmt.strip().rstrip(';').strip() for stmt in sqlparse.split(sql)]
+        statements = [stmt for stmt in statements if stmt]
+        if any(sqlparse.parse(stmt)[0].get_type() not in ('INSERT', 'UPDATE', 'DELETE')
+               for stmt in statements):
+            print("[yellow]批处理模式只收集 INSERT/UPDATE/DELETE，其他语句请先 /batch end;[/yellow]")
+            return
+        self.batch.extend(statements)
+
+    def flush_batch(self, statements: list):
+        """
+        在一个事务中发送收集的语句：相邻同表 INSERT 合并为多行 INSERT，
+        其余按 BATCH_PAGE_SIZE 条拼接后一次往返发送（即 execute_batch 的做法）。
+        已在用户事务中时只执行不提交，由用户决定 COMMIT。
+        """
+        if not statements:
+            print("[yellow]没有需要提交的语句[/yellow]")
+            return
+
+        packed = pack_statements(statements)
+        own_transaction = not self.in_transaction
+        try:
+            cursor = self.connect().cursor()
+            if own_transaction:
+                cursor.execute("BEGIN")
+            for i in range(0, len(packed), BATCH_PAGE_SIZE):
+                # 分号单独成行，避免落进语句末尾的 -- 注释里
+                cursor.execute("\n;\n".join(packed[i:i + BATCH_PAGE_SIZE]))
+            if own_transaction:
+                cursor.execute("COMMIT")
+            print(f"[green]批处理完成：{len(statements)} 条语句，"
+                  f"{(len(packed) + BATCH_PAGE_SIZE - 1) // BATCH_PAGE_SIZE} 次往返"
+                  f"{'，已提交' if own_transaction else '，事务未提交'}[/green]")
+        except Error as e:
+            print(f"[red]批处理执行失败: {e}[/red]")
+            if own_transaction and self.in_transaction:
+                # 连接处于 autocommit，conn.rollback() 不会发送任何语句
+                self.conn.cursor().execute("ROLLBACK")
+                print("[yellow]批处理事务已回滚[/yellow]")
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            if self.in_transaction:
+                print("[yellow]未提交的事务已回滚[/yellow]")
+            self.conn.close()
@@ -0,0 +1,98 @@
+# sql_guard.py
+from typing import Optional
+
+import sqlparse
+from sqlparse.sql import Parenthesis
+from rich import print
+
+# 大模型生成 SQL 的执行阈值，超过时需要用户确认
+MAX_PLAN_COST = 1_000_000
+MAX_PLAN_ROWS = 100_000
+# 自动为无 LIMIT 的 SELECT 追加的行数上限
+AUTO_LIMIT = 1000
+# 生成 SQL 的语句超时（毫秒）
+STATEMENT_TIMEOUT_MS = 10_000
+
+
+def _has_row_limit(token_list) -> bool:
+    """
+    语句本层是否已有 LIMIT / FETCH / FOR 子句。sqlparse 会把 WHERE 之后的
+    这些子句归入 Where 分组，所以要进入子分组查找，但不进入括号（子查询）。
+    """
+    for token in token_list.tokens:
+        if token.is_keyword and token.normalized in ('LIMIT', 'FETCH', 'FOR'):
+            return True
+        if token.is_group and not isinstance(token, Parenthesis) and _has_row_limit(token):
+            return True
+    return False
+
+
+def add_limit(sql: str, limit: int = AUTO_LIMIT) -> tuple:
+    """
+    为外层没有 LIMIT / FETCH / FOR 的 SELECT 语句追加 LIMIT。
+
+    返回:
+        (处理后的 SQL, 是否追加了 LIMIT)
+    """
+    sql = sql.strip().rstrip('；;').strip()
+    statement = sqlparse.parse(sql)[0]
+    if statement.get_type() != 'SELECT':
+        return sql, False
+
+    if _has_row_limit(statement):
+        return sql, False
+
+    # 换行追加，避免被末尾的 -- 注释吞掉
+    return f"{sql}\nLIMIT {limit}", True
+
+
+def estimate_plan(cursor, sql: str, limited: bool = False) -> tuple:
+    """
+    用普通 EXPLAIN（不执行语句）获取优化器预估的总代价和返回行数。
+
+    limited 为 True 时顶层是自动追加的 Limit 节点，其行数不会超过 AUTO_LIMIT，
+    因此行数取 Limit 子计划的预估值，即不加 LIMIT 时查询会产生的行数。
+    """
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+    plan = cursor.fetchone()[0][0]['Plan']
+    rows = plan['Plan Rows']
+    if limited and plan['Node Type'] == 'Limit' and plan.get('Plans'):
+        rows = plan['Plans'][0]['Plan Rows']
+    return plan['Total Cost'], rows
+
+
+def guard_query(cursor, sql: str,
+                max_cost: float = MAX_PLAN_COST,
+                max_rows: int = MAX_PLAN_ROWS,
+                limit: int = AUTO_LIMIT) -> Optional[str]:
+    """
+    执行前检查生成的 SQL：只允许单条语句，自动补 LIMIT，
+    并按 EXPLAIN 预估代价/行数决定是否需要用户确认。
+    cursor 所在连接须关闭自动提交，检查结束时当前事务会被回滚。
+
+    返回:
+        可以执行的 SQL；被拒绝或用户取消时返回 None
+    """
+    statements = [s for s in sqlparse.split(sql) if s.strip().rstrip('；;').strip()]
+    if len(statements) != 1:
+        print(f"[red]生成的 SQL 包含 {len(statements)} 条语句，已拒绝执行。[/red]")
+        return None
+
+    sql, limited = add_limit(statements[0], limit)
+    if limited:
+        print(f"[yellow]查询未限制行数，已自动追加 LIMIT {limit}[/yellow]")
+
+    cost, rows = estimate_plan(cursor, sql, limited)
+    # 结束 EXPLAIN 所在的事务，等待用户确认时不持有任何锁；之后的执行会开启新事务
+    cursor.connection.rollback()
+    print(f"[dim]预估代价 {cost:,.0f}，预估行数 {rows:,}{'（LIMIT 前）' if limited else ''}[/dim]")
+
+    if cost > max_cost or rows > max_rows:
+        print(f"[bold yellow]该查询超过阈值（代价 {max_cost:,.0f} / 行数 {max_rows:,}），"
+              f"可能给数据库带来较大负载。[/bold yellow]")
+        answer = input("仍要执行吗？[y/N]: ").strip().lower()
+        if answer not in ('y', 'yes'):
+            print("[yellow]已取消执行。[/yellow]")
+            return None
+
+    return sql
@@ -11,6 +11,7 @@ from rich import print
 from commands import run_query, load_config, test_db_connection
 from commands.completion import SQLSmartCompleter
 from commands.config import show_help
+from commands.session import DBSession
 
 
 @Condition
@@ -29,6 +30,14 @@ def interactive_shell():
     config = load_config(verbose=True)
     config_valid = test_db_connection(config, verbose=True)
 
+    # 为已登记的分区表补齐未来分区、按保留期删除旧分区
+    if config_valid:
+        from commands.partition import run_partition_maintenance
+        run_partition_maintenance(config)
+
+    # 跨输入共享的数据库连接，保存事务状态
+    db_session = DBSession(config)
+
     # 即使连接失败也允许进入交互界面
     sql_completer = SQLSmartCompleter(config if config_valid else {})
 
@@ -42,7 +51,10 @@ def interactive_shell():
     while True:
         try:
             prompt_color = 'ansimagenta' if config_valid else 'ansired'
-            user_input = session.prompt(HTML(f'<{prompt_color}><b>SQL>>></b></{prompt_color}> '))
+            if db_session.in_transaction:
+                prompt_color = 'ansiyellow'
+            prompt_label = db_session.prompt_label()
+            user_input = session.prompt(HTML(f'<{prompt_color}><b>{prompt_label}>>></b></{prompt_color}> '))
             raw = user_input.strip()
 
             if raw.lower().rstrip('；;') in ('exit', 'quit'):
@@ -57,6 +69,8 @@ def interactive_shell():
                     if cmd == '/reset_demo':
                         if config_valid:
                             from commands.reset import run_reset_with_schema
+                            # 重置会终止目标库上的所有连接，先关闭会话连接
+                            db_session.close()
                             run_reset_with_schema(config)
                         else:
                             print("[red]数据库配置无效，请先使用 /config_reset 修复[/red]")
@@ -64,6 +78,7 @@ def interactive_shell():
                     elif cmd == '/reset':
                         if config_valid:
                             from commands.reset import run_reset
+                            db_session.close()
                             run_reset(config)
                         else:
                             print("[red]数据库配置无效，请先使用 /config_reset 修复[/red]")
@@ -83,10 +98,35 @@ def interactive_shell():
                         else:
                             print("[red]数据库配置无效，请先使用 /config_reset 修复[/red]")
 
+                    elif cmd.split()[0] == '/partition':
+                        if config_valid:
+                            from commands.partition import run_partition
+                            run_partition(config, cmd.split()[1:])
+                        else:
+                            print("[red]数据库配置无效，请先使用 /config_reset 修复[/red]")
+
+                    elif cmd.split()[0] == '/rollup':
+                        if config_valid:
+                            from commands.rollup import run_rollup
+                            run_rollup(config, cmd.split()[1:])
+                        else:
+                            print("[red]数据库配置无效，请先使用 /config_reset 修复[/red]")
+
+                    elif cmd.split()[0] == '/autocommit':
+                        db_session.set_autocommit(cmd.split()[1:])
+
+                    elif cmd.split()[0] == '/batch':
+                        if config_valid:
+                            db_session.run_batch(cmd.split()[1:])
+                        else:
+                            print("[red]数据库配置无效，请先使用 /config_reset 修复[/red]")
+
                     elif cmd in ('/config_reset', '/reset_config'):
                         from commands.config import reset_config
                         config = reset_config()
                         config_valid = test_db_connection(config, verbose=True)
+                        db_session.close()
+                        db_session = DBSession(config)
                         
                     elif cmd == '/status':
                         """判断当前离线/在线"""
@@ -110,8 +150,10 @@ def interactive_shell():
                         print("[red]当前数据库配置无效，自然语言查询不可用。请先运行 /config_reset[/red]")
 
                 else:
-                    if config_valid:
-                        run_query(command, config)
+                    if config_valid and db_session.batch is not None:
+                        db_session.add_to_batch(command)
+                    elif config_valid:
+                        run_query(command, config, db_session)
                     else:
                         print("[red]数据库配置无效，无法执行 SQL 查询。请先运行 /config_reset[/red]")
 
@@ -125,6 +167,8 @@ def interactive_shell():
         except Exception as e:
             print(f"[red]错误: {e}[/red]")
 
+    db_session.close()
+
 
 
 if __name__ == "__main__":
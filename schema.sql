@@ -180,6 +180,32 @@ CREATE TABLE energy_consumption (
 );
 
 
+-- Table/column comments (used by natural-language queries to pick relevant tables)
+COMMENT ON TABLE users IS '用户账号';
+COMMENT ON TABLE homes IS '家庭/住宅';
+COMMENT ON TABLE user_home_assignments IS '用户与家庭的成员关系和角色';
+COMMENT ON TABLE rooms IS '家庭中的房间';
+COMMENT ON TABLE devices IS '智能设备（灯、空调、门锁、传感器、音箱、窗帘、电视）';
+COMMENT ON TABLE device_status_history IS '设备状态变更历史';
+COMMENT ON TABLE usage_logs IS '设备使用日志/使用时长记录';
+COMMENT ON TABLE security_events IS '安全事件/安防告警';
+COMMENT ON TABLE user_feedback IS '用户反馈和评分';
+COMMENT ON TABLE automation_rules IS '自动化规则/场景';
+COMMENT ON TABLE energy_consumption IS '设备能耗/耗电量/用电记录';
+COMMENT ON COLUMN users.username IS '用户名';
+COMMENT ON COLUMN homes.home_name IS '家庭名称';
+COMMENT ON COLUMN homes.city IS '城市';
+COMMENT ON COLUMN rooms.room_name IS '房间名称';
+COMMENT ON COLUMN devices.device_name IS '设备名称';
+COMMENT ON COLUMN devices.device_type IS '设备类型';
+COMMENT ON COLUMN devices.manufacturer IS '厂商/品牌';
+COMMENT ON COLUMN devices.current_status IS '设备当前状态';
+COMMENT ON COLUMN usage_logs.duration_seconds IS '使用时长（秒）';
+COMMENT ON COLUMN security_events.severity IS '严重程度';
+COMMENT ON COLUMN user_feedback.rating IS '评分 1-5 星';
+COMMENT ON COLUMN energy_consumption.consumption_kwh IS '耗电量（千瓦时 kWh）';
+
+
 -- ====================================================================================
 -- 3. Data Insertion (DML - Data Manipulation Language)
 -- ====================================================================================
@@ -0,0 +1,42 @@
+from commands.session import pack_statements
+
+
+def test_pack_merges_adjacent_inserts_into_same_table():
+    packed = pack_statements([
+        "INSERT INTO t (a, b) VALUES (1, 'x')",
+        "insert into t (a, b) values (2, '50%')",
+        "UPDATE t SET a = 3",
+        "INSERT INTO t (a, b) VALUES (4, 'y')",
+    ])
+    assert packed == [
+        "INSERT INTO t (a, b) VALUES (1, 'x'),\n(2, '50%')",
+        "UPDATE t SET a = 3",
+        "INSERT INTO t (a, b) VALUES (4, 'y')",
+    ]
+
+
+def test_pack_does_not_merge_into_multi_statement_entry():
+    # 一项中含多条语句时，后续行不能被拼进最后一条语句（会写进错误的表）
+    entries = [
+        "INSERT INTO t VALUES (1); INSERT INTO u VALUES (2)",
+        "INSERT INTO t VALUES (3)",
+    ]
+    assert pack_statements(entries) == entries
+
+    entries = ["INSERT INTO t VALUES (1); DELETE FROM t WHERE (a = 1)", "INSERT INTO t VALUES (2)"]
+    assert pack_statements(entries) == entries
+
+
+def test_pack_keeps_returning_and_on_conflict_separate():
+    entries = [
+        "INSERT INTO t VALUES (1) RETURNING a",
+        "INSERT INTO t VALUES (2)",
+        "INSERT INTO t VALUES (3) ON CONFLICT (a) DO UPDATE SET b = coalesce(b)",
+    ]
+    assert pack_statements(entries) == entries
+
+
+def test_pack_keeps_values_with_subquery_separate():
+    # 合并后子查询在同一条语句中执行，看不到前面的行
+    entries = ["INSERT INTO t VALUES (1)", "INSERT INTO t VALUES ((SELECT max(a) FROM t) + 1)"]
+    assert pack_statements(entries) == entries
@@ -0,0 +1,30 @@
+from commands.sql_guard import add_limit
+
+
+def test_add_limit_to_plain_select():
+    assert add_limit("SELECT * FROM t WHERE a = 1;", 10) == ("SELECT * FROM t WHERE a = 1\nLIMIT 10", True)
+
+
+def test_add_limit_keeps_existing_row_limit():
+    for sql in [
+        "SELECT * FROM t LIMIT 5",
+        "SELECT * FROM t WHERE a = 1 LIMIT 5",
+        "SELECT * FROM t WHERE a = 1 FETCH FIRST 5 ROWS ONLY",
+        "SELECT * FROM t WHERE a = 1 FOR UPDATE",
+        "SELECT a, count(*) FROM t GROUP BY a HAVING count(*) > 1 LIMIT 5",
+    ]:
+        assert add_limit(sql, 10) == (sql, False)
+
+
+def test_add_limit_ignores_limit_in_subquery():
+    sql = "SELECT * FROM t WHERE a IN (SELECT a FROM u LIMIT 5)"
+    assert add_limit(sql, 10) == (f"{sql}\nLIMIT 10", True)
+
+
+def test_add_limit_after_trailing_comment():
+    # 追加在新行，不会落进 -- 注释
+    assert add_limit("SELECT * FROM t -- 全部设备", 10) == ("SELECT * FROM t -- 全部设备\nLIMIT 10", True)
+
+
+def test_add_limit_skips_non_select():
+    assert add_limit("UPDATE t SET a = 1", 10) == ("UPDATE t SET a = 1", False)